@@ -62,15 +62,6 @@ def check_system():
     except FileNotFoundError:
         print("❌ FFmpeg未安装或不在PATH中")
     
-    # 检查Python依赖
-    print()
-    print("检查Python依赖...")
-    try:
-        import ffmpeg
-        print("✅ ffmpeg-python已安装")
-    except ImportError:
-        print("❌ ffmpeg-python未安装")
-    
     print()
     input("按回车键返回主菜单...")
 
@@ -7,17 +7,134 @@
 import os
 import sys
 import argparse
-import glob
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import List, Tuple
-from ffmpeg_subtitle_merger import FFmpegSubtitleMerger
+from typing import Dict, Iterator, List, Optional, Tuple
+from ffmpeg_subtitle_merger import (
+    FFmpegSubtitleMerger,
+    NVENC_MAX_SESSIONS,
+    SOFT_SUBTITLE_CODECS,
+    configure_logging,
+    default_jobs
+)
+
+
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mkv', '.mov', '.mps', '.ts', '.m2ts'})
+# 字幕扩展名按优先级排列，同名候选字幕按此顺序选择
+SUBTITLE_EXTENSION_ORDER = ('.ass', '.srt', '.vtt', '.sub')
+SUBTITLE_EXTENSIONS = frozenset(SUBTITLE_EXTENSION_ORDER)
+_SUBTITLE_EXTENSION_RANK = {ext: rank for rank, ext in enumerate(SUBTITLE_EXTENSION_ORDER)}
+
+# 并发扫描目录的线程数
+SCAN_WORKERS = 8
+
+# 处理目录下的视频信息缓存文件
+CACHE_FILE_NAME = '.subtitle_merger_cache.json'
+# 每成功处理多少个文件保存一次缓存
+CACHE_SAVE_INTERVAL = 10
+
+
+def _scan_directory(directory: str) -> Tuple[List[str], List[str], List[str]]:
+    """
+    扫描单个目录（不递归）
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        (子目录列表, 视频文件列表, 字幕文件列表)
+    """
+    subdirs = []
+    video_files = []
+    subtitle_files = []
+
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # 与glob一致，跳过隐藏文件和目录
+                if entry.name.startswith('.'):
+                    continue
+                # 先按扩展名分类，媒体文件只需一次类型判断；
+                # 类型信息来自getdents返回的d_type，通常无需额外stat
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext in VIDEO_EXTENSIONS:
+                    if entry.is_file(follow_symlinks=False):
+                        video_files.append(entry.path)
+                        continue
+                elif ext in SUBTITLE_EXTENSIONS:
+                    if entry.is_file(follow_symlinks=False):
+                        subtitle_files.append(entry.path)
+                        continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+    except OSError:
+        # 无法访问的目录直接跳过
+        pass
+
+    return subdirs, video_files, subtitle_files
+
+
+def _subtitle_sort_key(subtitle_file: str) -> Tuple[int, str]:
+    """字幕排序键：先按扩展名优先级，再按路径"""
+    return _SUBTITLE_EXTENSION_RANK[os.path.splitext(subtitle_file)[1].lower()], subtitle_file
+
+
+def _scan_media_files(directory: str) -> Tuple[List[str], List[str]]:
+    """
+    遍历目录树，按扩展名收集视频和字幕文件
+
+    多个目录并发扫描，可掩盖网络文件系统和冷缓存下的读目录延迟
+
+    Args:
+        directory: 搜索目录
+
+    Returns:
+        (视频文件列表, 字幕文件列表)
+    """
+    video_files = []
+    subtitle_files = []
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        pending = {executor.submit(_scan_directory, directory)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, videos, subtitles = future.result()
+                video_files.extend(videos)
+                subtitle_files.extend(subtitles)
+                pending.update(executor.submit(_scan_directory, subdir) for subdir in subdirs)
+
+    video_files.sort()
+    subtitle_files.sort(key=_subtitle_sort_key)
+    return video_files, subtitle_files
+
+
+def _normalize_dir(directory: str) -> str:
+    """规范化目录路径，便于按字符串比较"""
+    return os.path.normcase(os.path.normpath(directory))
+
+
+def _is_same_or_subdir(path: str, directory: str) -> bool:
+    """判断规范化后的path是否为directory本身或其子目录"""
+    if path == directory:
+        return True
+    return path.startswith(directory if directory.endswith(os.sep) else directory + os.sep)
+
+
+def _dot_prefixes(stem: str) -> Iterator[str]:
+    """生成文件名在每个点号之前的前缀，如 a.b.c -> a, a.b"""
+    index = stem.find('.')
+    while index != -1:
+        yield stem[:index]
+        index = stem.find('.', index + 1)
 
 
 class BatchSubtitleMerger:
     """批量字幕合成器"""
     
-    def __init__(self, log_level: str = 'INFO'):
-        self.merger = FFmpegSubtitleMerger(log_level)
+    def __init__(self, log_level: Optional[str] = None, fonts_dir: Optional[str] = None):
+        self.merger = FFmpegSubtitleMerger(log_level, fonts_dir)
         self.logger = self.merger.logger
         
     def find_video_subtitle_pairs(self, directory: str) -> List[Tuple[str, str]]:
@@ -30,71 +147,156 @@ class BatchSubtitleMerger:
         Returns:
             (视频文件, 字幕文件) 元组列表
         """
-        video_extensions = ['*.mp4', '*.avi', '*.mkv', '*.mov', '*.mps', '*.ts', '*.m2ts']
-        subtitle_extensions = ['*.ass', '*.srt', '*.vtt', '*.sub']
-        
-        # 查找所有视频文件
-        video_files = []
-        for ext in video_extensions:
-            pattern = os.path.join(directory, '**', ext)
-            video_files.extend(glob.glob(pattern, recursive=True))
+        video_files, subtitle_files = _scan_media_files(directory)
         
-        # 查找所有字幕文件
-        subtitle_files = []
-        for ext in subtitle_extensions:
-            pattern = os.path.join(directory, '**', ext)
-            subtitle_files.extend(glob.glob(pattern, recursive=True))
+        # 按主文件名建立字幕索引，避免逐一比较所有视频和字幕
+        subtitle_entries = []
+        subtitles_by_stem: Dict[str, List[int]] = {}
+        subtitles_by_prefix: Dict[str, List[int]] = {}
+        for index, subtitle_file in enumerate(subtitle_files):
+            subtitle_dir, subtitle_name = os.path.split(subtitle_file)
+            subtitle_stem = os.path.splitext(subtitle_name)[0]
+            subtitle_entries.append((subtitle_file, subtitle_stem, _normalize_dir(subtitle_dir)))
+            subtitles_by_stem.setdefault(subtitle_stem, []).append(index)
+            # 字幕 "video.zh" 可匹配视频 "video"
+            for prefix in _dot_prefixes(subtitle_stem):
+                subtitles_by_prefix.setdefault(prefix, []).append(index)
         
         # 匹配视频和字幕文件
         pairs = []
         for video_file in video_files:
-            video_stem = Path(video_file).stem
-            video_dir = Path(video_file).parent
+            video_dir, video_name = os.path.split(video_file)
+            video_stem = os.path.splitext(video_name)[0]
+            video_dir = _normalize_dir(video_dir)
             
-            # 查找同名字幕文件
-            matching_subtitles = []
-            for subtitle_file in subtitle_files:
-                subtitle_stem = Path(subtitle_file).stem
-                subtitle_dir = Path(subtitle_file).parent
-                
-                # 检查是否同名且在同一目录或子目录
-                if (subtitle_stem == video_stem or 
-                    subtitle_stem.startswith(video_stem + '.') or
-                    video_stem.startswith(subtitle_stem + '.')):
-                    # 检查目录关系
-                    try:
-                        video_dir.relative_to(subtitle_dir)
-                        matching_subtitles.append(subtitle_file)
-                    except ValueError:
-                        try:
-                            subtitle_dir.relative_to(video_dir)
-                            matching_subtitles.append(subtitle_file)
-                        except ValueError:
-                            if video_dir == subtitle_dir:
-                                matching_subtitles.append(subtitle_file)
+            # 同名字幕、以视频名加"."开头的字幕、视频名以字幕名加"."开头的字幕
+            candidates = set(subtitles_by_stem.get(video_stem, ()))
+            candidates.update(subtitles_by_prefix.get(video_stem, ()))
+            for prefix in _dot_prefixes(video_stem):
+                candidates.update(subtitles_by_stem.get(prefix, ()))
+            
+            # 字幕需在同一目录、上级目录或子目录中
+            matching_subtitles = [
+                subtitle_entries[index]
+                for index in sorted(candidates)
+                if _is_same_or_subdir(video_dir, subtitle_entries[index][2])
+                or _is_same_or_subdir(subtitle_entries[index][2], video_dir)
+            ]
             
-            # 选择最佳匹配的字幕
+            # 选择最佳匹配的字幕，优先选择完全同名的
             if matching_subtitles:
-                # 优先选择完全同名的
-                best_match = None
-                for subtitle in matching_subtitles:
-                    if Path(subtitle).stem == video_stem:
-                        best_match = subtitle
-                        break
-                
-                if not best_match:
-                    best_match = matching_subtitles[0]
-                
-                pairs.append((video_file, best_match))
+                best_match = next(
+                    (entry for entry in matching_subtitles if entry[1] == video_stem),
+                    matching_subtitles[0]
+                )
+                pairs.append((video_file, best_match[0]))
         
         return pairs
     
+    def get_output_path(self, video_file: str, output_suffix: str, soft_sub: bool = False) -> str:
+        """
+        生成输出文件路径
+
+        Args:
+            video_file: 视频文件路径
+            output_suffix: 输出文件后缀
+            soft_sub: 是否封装软字幕
+
+        Returns:
+            输出文件路径
+        """
+        video_path = Path(video_file)
+        ext = video_path.suffix
+        if soft_sub and ext.lower() not in SOFT_SUBTITLE_CODECS:
+            # 原容器不支持字幕流时改用MKV
+            ext = '.mkv'
+        return str(video_path.parent / f"{video_path.stem}{output_suffix}{ext}")
+
+    def _merge_one(
+        self,
+        index: int,
+        total: int,
+        video_file: str,
+        subtitle_file: str,
+        output_file: str,
+        force_style: Optional[str],
+        soft_sub: bool = False
+    ) -> None:
+        """在工作线程中合成单个视频字幕文件对"""
+        self.logger.info(f"处理 {index}/{total}: {os.path.basename(video_file)}")
+        self.merger.merge_video_subtitle(
+            video_file,
+            subtitle_file,
+            output_file,
+            force_style,
+            soft_sub=soft_sub
+        )
+
+    def _merge_group(
+        self,
+        start_index: int,
+        total: int,
+        group: List[Tuple[str, str, str]],
+        force_style: Optional[str],
+        soft_sub: bool = False
+    ) -> List[Tuple[str, str, Optional[Exception]]]:
+        """
+        在工作线程中合成一组视频字幕文件对
+
+        Returns:
+            (视频文件, 输出文件, 异常) 列表，成功时异常为None
+        """
+        if len(group) > 1:
+            for offset, (video_file, _, _) in enumerate(group):
+                self.logger.info(f"处理 {start_index + offset}/{total}: {os.path.basename(video_file)}")
+            try:
+                self.merger.merge_video_subtitle_group(group, force_style)
+                return [(video_file, output_file, None) for video_file, _, output_file in group]
+            except Exception as e:
+                # 单个文件出错会导致整组失败，逐个重试以隔离问题文件
+                self.logger.warning(f"合并处理失败，改为逐个处理: {e}")
+
+        results = []
+        for offset, (video_file, subtitle_file, output_file) in enumerate(group):
+            try:
+                self._merge_one(
+                    start_index + offset,
+                    total,
+                    video_file,
+                    subtitle_file,
+                    output_file,
+                    force_style,
+                    soft_sub
+                )
+                results.append((video_file, output_file, None))
+            except Exception as e:
+                results.append((video_file, output_file, e))
+        return results
+
+    def _start_warm_up(self) -> List[threading.Thread]:
+        """
+        在后台完成一次性的NVENC检测和字体缓存预热，避免并行任务各自重复这些工作
+
+        Returns:
+            预热线程列表
+        """
+        threads = []
+        for target in (self.merger.check_nvidia_support, self.merger.warm_up_fonts):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
     def batch_merge(
         self, 
         directory: str, 
         output_suffix: str = "_with_subtitles",
         force_style: str = None,
-        dry_run: bool = False
+        dry_run: bool = False,
+        jobs: Optional[int] = None,
+        use_cache: bool = True,
+        group_size: int = 1,
+        soft_sub: Optional[bool] = False
     ) -> bool:
         """
         批量合成视频字幕
@@ -104,12 +306,21 @@ class BatchSubtitleMerger:
             output_suffix: 输出文件后缀
             force_style: 强制字幕样式
             dry_run: 仅显示将要处理的文件，不实际处理
+            jobs: 并行处理数量，默认根据编码方式自动选择
+            use_cache: 是否使用目录下的视频信息缓存
+            group_size: 每次FFmpeg调用合成的文件数，适合大量短视频
+            soft_sub: 封装软字幕而不重新编码视频，None表示按文件自动判断
             
         Returns:
             是否全部成功
         """
         self.logger.info(f"开始批量处理目录: {directory}")
         
+        warm_up_threads = []
+        if not dry_run and soft_sub is False:
+            # 扫描目录的同时在后台完成预热
+            warm_up_threads = self._start_warm_up()
+        
         # 查找视频字幕对
         pairs = self.find_video_subtitle_pairs(directory)
         
@@ -124,7 +335,7 @@ class BatchSubtitleMerger:
             for i, (video, subtitle) in enumerate(pairs, 1):
                 video_name = os.path.basename(video)
                 subtitle_name = os.path.basename(subtitle)
-                output_name = Path(video).stem + output_suffix + Path(video).suffix
+                output_name = os.path.basename(self.get_output_path(video, output_suffix, soft_sub))
                 
                 print(f"{i}. 视频: {video_name}")
                 print(f"   字幕: {subtitle_name}")
@@ -134,37 +345,104 @@ class BatchSubtitleMerger:
             print(f"总计: {len(pairs)} 个文件对")
             return True
         
+        # 生成输出文件名，跳过已存在的输出
+        tasks = []
+        for video_file, subtitle_file in pairs:
+            output_file = self.get_output_path(video_file, output_suffix, soft_sub)
+            
+            if os.path.exists(output_file):
+                self.logger.warning(f"输出文件已存在，跳过: {os.path.basename(output_file)}")
+                continue
+            
+            tasks.append((video_file, subtitle_file, output_file))
+        
         # 实际处理
         success_count = 0
         failed_files = []
         
-        for i, (video_file, subtitle_file) in enumerate(pairs, 1):
-            try:
-                self.logger.info(f"处理 {i}/{len(pairs)}: {os.path.basename(video_file)}")
-                
-                # 生成输出文件名
-                video_path = Path(video_file)
-                output_file = str(video_path.parent / f"{video_path.stem}{output_suffix}{video_path.suffix}")
-                
-                # 检查输出文件是否已存在
-                if os.path.exists(output_file):
-                    self.logger.warning(f"输出文件已存在，跳过: {os.path.basename(output_file)}")
-                    continue
-                
-                # 执行合成
-                self.merger.merge_video_subtitle(
-                    video_file,
-                    subtitle_file,
-                    output_file,
-                    force_style
-                )
-                
-                success_count += 1
-                self.logger.info(f"✅ 完成: {os.path.basename(output_file)}")
+        cache_file = os.path.join(directory, CACHE_FILE_NAME) if use_cache else None
+        if tasks and cache_file:
+            loaded = self.merger.load_probe_cache(cache_file)
+            if loaded:
+                self.logger.info(f"已载入 {loaded} 条视频信息缓存")
+        
+        if tasks:
+            # 区分封装软字幕和烧录字幕的任务
+            if soft_sub is None:
+                mux_tasks = []
+                burn_tasks = []
+                for task in tasks:
+                    if self.merger.should_mux_subtitle(task[1], task[2], force_style):
+                        mux_tasks.append(task)
+                    else:
+                        burn_tasks.append(task)
+            elif soft_sub:
+                mux_tasks, burn_tasks = tasks, []
+            else:
+                mux_tasks, burn_tasks = [], tasks
+            
+            if burn_tasks:
+                if soft_sub is None:
+                    # 自动判断模式下扫描前无法得知是否需要烧录，确有烧录任务时才预热
+                    warm_up_threads = self._start_warm_up()
+                for thread in warm_up_threads:
+                    thread.join()
+                use_nvenc = self.merger.check_nvidia_support()
+            else:
+                use_nvenc = False
+                group_size = 1
+            if use_nvenc and group_size > NVENC_MAX_SESSIONS:
+                self.logger.warning(f"NVENC最多同时运行 {NVENC_MAX_SESSIONS} 个编码任务，分组大小已调整")
+                group_size = NVENC_MAX_SESSIONS
+            
+            # 封装不重新编码，无需分组合并也不占用NVENC
+            groups = [
+                (burn_tasks[i:i + group_size], False)
+                for i in range(0, len(burn_tasks), group_size)
+            ]
+            groups.extend(([task], True) for task in mux_tasks)
+            
+            if jobs is None:
+                jobs = default_jobs(use_nvenc, group_size)
+            elif use_nvenc and jobs > default_jobs(True, group_size):
+                self.logger.warning(f"NVENC最多同时运行 {NVENC_MAX_SESSIONS} 个编码任务，并行数已调整")
+                jobs = default_jobs(True, group_size)
+            jobs = min(jobs, len(groups))
+            self.logger.info(f"并行处理数量: {jobs}")
+            
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = []
+                start_index = 1
+                for group, group_soft_sub in groups:
+                    futures.append(executor.submit(
+                        self._merge_group,
+                        start_index,
+                        len(tasks),
+                        group,
+                        force_style,
+                        group_soft_sub
+                    ))
+                    start_index += len(group)
                 
-            except Exception as e:
-                self.logger.error(f"❌ 处理失败: {os.path.basename(video_file)} - {e}")
-                failed_files.append(video_file)
+                try:
+                    for future in as_completed(futures):
+                        for video_file, output_file, error in future.result():
+                            if error is None:
+                                success_count += 1
+                                self.logger.info(f"✅ 完成: {os.path.basename(output_file)}")
+                                if cache_file and success_count % CACHE_SAVE_INTERVAL == 0:
+                                    self.merger.save_probe_cache(cache_file)
+                            else:
+                                self.logger.error(f"❌ 处理失败: {os.path.basename(video_file)} - {error}")
+                                failed_files.append(video_file)
+                except KeyboardInterrupt:
+                    # 取消尚未开始的任务，否则退出线程池时仍会逐个执行完
+                    for future in futures:
+                        future.cancel()
+                    raise
+            
+            if cache_file:
+                self.merger.save_probe_cache(cache_file)
         
         # 输出结果统计
         self.logger.info(f"\n=== 批量处理完成 ===")
@@ -188,6 +466,10 @@ def main():
   python batch_merger.py "C:\\测试视频合成"                    # 批量处理目录
   python batch_merger.py "C:\\测试视频合成" --dry-run          # 预览模式
   python batch_merger.py "C:\\测试视频合成" --suffix "_硬字幕"   # 自定义输出后缀
+  python batch_merger.py "C:\\测试视频合成" --jobs 4            # 同时处理4个文件
+  python batch_merger.py "C:\\测试视频合成" --group-size 4      # 每次FFmpeg调用合成4个文件
+  python batch_merger.py "C:\\测试视频合成" --soft-sub          # 封装软字幕，不重新编码
+  python batch_merger.py "C:\\测试视频合成" --auto-mux          # 可封装时自动改为软字幕
         """
     )
     
@@ -201,6 +483,10 @@ def main():
         '--force-style',
         help='强制字幕样式'
     )
+    parser.add_argument(
+        '--fonts-dir',
+        help='字幕渲染额外使用的字体目录'
+    )
     parser.add_argument(
         '--log-level',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -212,6 +498,32 @@ def main():
         action='store_true',
         help='预览模式，仅显示将要处理的文件'
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help=f'并行处理数量 (默认: NVENC为{NVENC_MAX_SESSIONS}，软件编码为CPU核心数的一半)'
+    )
+    parser.add_argument(
+        '--group-size',
+        type=int,
+        default=1,
+        help='每次FFmpeg调用合成的文件数，可减少大量短视频的启动开销 (默认: 1)'
+    )
+    parser.add_argument(
+        '--soft-sub',
+        action='store_true',
+        help='封装软字幕而不重新编码视频，不支持字幕流的格式输出为MKV'
+    )
+    parser.add_argument(
+        '--auto-mux',
+        action='store_true',
+        help='输出为MKV/MP4、字幕为SRT/ASS且未指定--force-style时，自动改为封装软字幕'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'不读写目录下的视频信息缓存 ({CACHE_FILE_NAME})'
+    )
     
     args = parser.parse_args()
     
@@ -220,13 +532,26 @@ def main():
         print(f"❌ 目录不存在: {args.directory}")
         sys.exit(1)
     
+    if args.jobs is not None and args.jobs < 1:
+        print(f"❌ 并行处理数量必须大于0: {args.jobs}")
+        sys.exit(1)
+    
+    if args.group_size < 1:
+        print(f"❌ 分组大小必须大于0: {args.group_size}")
+        sys.exit(1)
+    
     try:
-        batch_merger = BatchSubtitleMerger(args.log_level)
+        configure_logging(args.log_level)
+        batch_merger = BatchSubtitleMerger(fonts_dir=args.fonts_dir)
         success = batch_merger.batch_merge(
             args.directory,
             args.suffix,
             args.force_style,
-            args.dry_run
+            args.dry_run,
+            args.jobs,
+            not args.no_cache,
+            args.group_size,
+            True if args.soft_sub else (None if args.auto_mux else False)
         )
         
         if success:
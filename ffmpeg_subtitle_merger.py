@@ -10,29 +10,199 @@ FFmpeg视频字幕合成工具
 import os
 import sys
 import argparse
-import ffmpeg
 import json
 import subprocess
 import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 from fractions import Fraction
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    # orjson为可选依赖，未安装时使用标准库
+    from json import loads as _json_loads
+
+
+# 日志级别名称到logging常量的映射
+_LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+}
+
+_logging_configured = False
+
+# 消费级显卡同时运行的NVENC编码会话上限
+NVENC_MAX_SESSIONS = 2
+
+
+def default_jobs(use_nvenc: bool, group_size: int = 1) -> int:
+    """
+    根据编码方式计算默认并行数
+
+    Args:
+        use_nvenc: 是否使用NVENC硬件编码
+        group_size: 每次FFmpeg调用合成的文件数
+
+    Returns:
+        默认并行处理数量
+    """
+    if use_nvenc:
+        # 每个文件占用一个NVENC会话
+        return max(1, NVENC_MAX_SESSIONS // group_size)
+    # libx264自身已多线程，按核心数的一半并行即可
+    return max(1, (os.cpu_count() or 1) // 2 // group_size)
+
+
+# 分辨率档位的像素上限及对应的基础码率 (bps)
+_BITRATE_TIER_PIXELS = (
+    640 * 480,    # SD
+    1280 * 720,   # HD
+    1920 * 1080,  # FHD
+    3840 * 2160,  # 4K
+)
+_BITRATE_TIER_RATES = (
+    1500000,   # 1.5 Mbps
+    3000000,   # 3 Mbps
+    5000000,   # 5 Mbps
+    15000000,  # 15 Mbps
+    40000000,  # 8K+: 40 Mbps
+)
+
+# 软字幕封装支持的输出容器及对应的字幕编码
+SOFT_SUBTITLE_CODECS = {'.mkv': 'copy', '.mp4': 'mov_text', '.mov': 'mov_text'}
+
+
+def _build_filter_escapes() -> Dict[int, str]:
+    """
+    构建滤镜参数值的转义表
+
+    参数值先按选项语法转义 \\ ' = :，再按滤镜图语法转义 \\ ' [ ] , ;
+    两级合并为一张表，一次translate即可得到可直接写入-vf的字符串
+    """
+    table = {}
+    for char in "\\'=:[],;":
+        escaped = '\\' + char if char in "\\'=:" else char
+        table[ord(char)] = ''.join('\\' + c if c in "\\'[],;" else c for c in escaped)
+    return table
+
+
+# 滤镜参数值转义表
+_FILTER_VALUE_ESCAPES = _build_filter_escapes()
+
+# 可自动改为软字幕封装的输出格式和字幕格式
+AUTO_MUX_OUTPUT_FORMATS = frozenset({'.mkv', '.mp4'})
+AUTO_MUX_SUBTITLE_FORMATS = frozenset({'.ass', '.srt'})
+
+# 预热字体缓存用的最小字幕
+_WARMUP_SUBTITLE = """[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,字幕
+"""
+
+# 字幕路径转义表
+if os.name == 'nt':
+    # Windows: 反斜杠转为正斜杠，避免多级转义
+    _SUBTITLE_PATH_ESCAPES = {**_FILTER_VALUE_ESCAPES, ord('\\'): '/'}
+else:
+    _SUBTITLE_PATH_ESCAPES = _FILTER_VALUE_ESCAPES
+
+
+def configure_logging(log_level: str = 'INFO') -> None:
+    """
+    配置日志输出，仅首次调用生效
+
+    Args:
+        log_level: 日志级别
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+
+    logging.basicConfig(
+        level=_LOG_LEVELS.get(log_level.upper(), logging.INFO),
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    _logging_configured = True
+
+
+@lru_cache(maxsize=256)
+def _smart_bitrate(width: int, height: int, fps: float, original_bitrate: int) -> int:
+    """按分辨率档位和帧率计算码率"""
+    if original_bitrate > 0:
+        return original_bitrate
+
+    base_bitrate = _BITRATE_TIER_RATES[bisect_left(_BITRATE_TIER_PIXELS, width * height)]
+
+    # 根据帧率调整，最多2倍
+    fps_factor = min(fps / 25.0, 2.0)
+    return int(base_bitrate * fps_factor)
+
+
+@lru_cache(maxsize=256)
+def _build_codec_args(video_codec: str, bitrate: int) -> Tuple[str, ...]:
+    """生成编码器参数"""
+    if video_codec == 'h264_nvenc':
+        # NVENC特定参数
+        return (
+            '-preset', 'medium',
+            '-rc', 'vbr',
+            '-cq', '23',
+            '-b:v', str(bitrate),
+            '-maxrate', str(int(bitrate * 1.2)),
+            '-bufsize', str(int(bitrate * 2)),
+            '-gpu', '0'  # 使用第一个GPU
+        )
+
+    # x264参数
+    return (
+        '-preset', 'medium',
+        '-crf', '23',
+        '-b:v', str(bitrate),
+        '-threads', '0'  # 自动检测线程数
+    )
+
+
+@lru_cache(maxsize=1024)
+def _escape_abs_subtitle_path(abs_path: str) -> str:
+    """转义绝对路径中的特殊字符"""
+    return abs_path.translate(_SUBTITLE_PATH_ESCAPES)
+
 
 class FFmpegSubtitleMerger:
     """FFmpeg视频字幕合成器 - 优化版本"""
 
-    def __init__(self, log_level: str = 'INFO'):
+    def __init__(self, log_level: Optional[str] = None, fonts_dir: Optional[str] = None):
         self.supported_video_formats = ['.mps', '.mp4', '.avi', '.mkv', '.mov', '.ts', '.m2ts']
         self.supported_subtitle_formats = ['.ass', '.srt', '.vtt', '.sub']
 
-        # 设置日志
-        logging.basicConfig(
-            level=getattr(logging, log_level.upper()),
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # 日志通常由main()配置，仅在显式指定级别时在此配置
+        if log_level is not None:
+            configure_logging(log_level)
         self.logger = logging.getLogger(__name__)
 
+        # 字幕渲染额外使用的字体目录
+        self.fonts_dir = fonts_dir
+
+        # NVENC检测结果在进程生命周期内不会变化，只检测一次
+        self._nvenc_supported: Optional[bool] = None
+        self._nvenc_lock = threading.Lock()
+
+        # ffprobe结果缓存: 绝对路径 -> (文件大小, 修改时间ns, 视频信息)
+        self._probe_cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        self._probe_cache_lock = threading.Lock()
+        # 缓存中是否有尚未保存的新结果
+        self._probe_cache_dirty = False
+
     def parse_frame_rate(self, rate_str: str) -> float:
         """
         安全地解析帧率字符串
@@ -66,30 +236,11 @@ class FFmpegSubtitleMerger:
         Returns:
             建议的码率 (bps)
         """
-        if original_bitrate > 0:
-            return original_bitrate
-
-        # 基于分辨率的基础码率计算
-        pixels = width * height
-
-        if pixels <= 640 * 480:  # SD
-            base_bitrate = 1500000  # 1.5 Mbps
-        elif pixels <= 1280 * 720:  # HD
-            base_bitrate = 3000000  # 3 Mbps
-        elif pixels <= 1920 * 1080:  # FHD
-            base_bitrate = 5000000  # 5 Mbps
-        elif pixels <= 3840 * 2160:  # 4K
-            base_bitrate = 15000000  # 15 Mbps
-        else:  # 8K+
-            base_bitrate = 40000000  # 40 Mbps
-
-        # 根据帧率调整
-        fps_factor = min(fps / 25.0, 2.0)  # 最多2倍调整
-        return int(base_bitrate * fps_factor)
-        
+        return _smart_bitrate(width, height, fps, original_bitrate)
+
     def probe_video_info(self, video_path: str) -> Dict[str, Any]:
         """
-        获取视频信息
+        获取视频信息，文件未变化时直接返回缓存结果
 
         Args:
             video_path: 视频文件路径
@@ -97,13 +248,117 @@ class FFmpegSubtitleMerger:
         Returns:
             视频信息字典
         """
+        abs_path = os.path.abspath(video_path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            # 交给ffprobe报告具体错误
+            return self._probe_video_info(video_path)
+
+        with self._probe_cache_lock:
+            cached = self._probe_cache.get(abs_path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            self.logger.debug(f"使用缓存的视频信息: {video_path}")
+            return dict(cached[2])
+
+        video_info = self._probe_video_info(video_path)
+        with self._probe_cache_lock:
+            self._probe_cache[abs_path] = (stat.st_size, stat.st_mtime_ns, video_info)
+            self._probe_cache_dirty = True
+        return dict(video_info)
+
+    def load_probe_cache(self, cache_file: str) -> int:
+        """
+        从JSON文件载入ffprobe结果缓存
+
+        Args:
+            cache_file: 缓存文件路径
+
+        Returns:
+            载入的条目数
+        """
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"无法读取缓存文件 {cache_file}: {e}")
+            return 0
+
+        entries = data.get('probe') if isinstance(data, dict) else None
+        if not isinstance(entries, dict):
+            self.logger.warning(f"缓存文件格式无效，已忽略: {cache_file}")
+            return 0
+
+        loaded = {}
+        for path, entry in entries.items():
+            try:
+                loaded[path] = (int(entry['size']), int(entry['mtime_ns']), dict(entry['info']))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        with self._probe_cache_lock:
+            self._probe_cache.update(loaded)
+        return len(loaded)
+
+    def save_probe_cache(self, cache_file: str) -> None:
+        """
+        将ffprobe结果缓存写入JSON文件，没有新的探测结果时不写入
+
+        Args:
+            cache_file: 缓存文件路径
+        """
+        with self._probe_cache_lock:
+            if not self._probe_cache_dirty:
+                return
+            self._probe_cache_dirty = False
+            cache_items = list(self._probe_cache.items())
+
+        # 不再保存已删除或已重命名文件的条目
+        entries = {
+            path: {'size': size, 'mtime_ns': mtime_ns, 'info': info}
+            for path, (size, mtime_ns, info) in cache_items
+            if os.path.exists(path)
+        }
+
+        # 先写临时文件再替换，避免中断时留下损坏的缓存
+        temp_file = f"{cache_file}.tmp"
         try:
-            self.logger.info(f"正在分析视频文件: {video_path}")
-            probe = ffmpeg.probe(video_path)
-            video_stream = next(
-                (stream for stream in probe['streams'] if stream['codec_type'] == 'video'),
-                None
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'probe': entries}, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            self.logger.warning(f"无法写入缓存文件 {cache_file}: {e}")
+            with self._probe_cache_lock:
+                self._probe_cache_dirty = True
+
+    def _probe_video_info(self, video_path: str) -> Dict[str, Any]:
+        """调用ffprobe获取视频信息"""
+        self.logger.info(f"正在分析视频文件: {video_path}")
+
+        # 只请求用到的字段，减少ffprobe输出和解析开销
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe', '-v', 'error',
+                    '-select_streams', 'v:0',
+                    '-show_entries', 'stream=width,height,r_frame_rate,duration,bit_rate,codec_name,pix_fmt',
+                    '-of', 'json',
+                    video_path
+                ],
+                capture_output=True
             )
+        except OSError as e:
+            raise RuntimeError(f"获取视频信息失败: {e}")
+
+        if result.returncode != 0:
+            error_msg = result.stderr.decode(errors='replace').strip()
+            raise RuntimeError(f"FFmpeg探测失败: {error_msg}")
+
+        try:
+            streams = _json_loads(result.stdout).get('streams') or []
+            video_stream = streams[0] if streams else None
 
             if not video_stream:
                 raise ValueError("未找到视频流")
@@ -147,9 +402,6 @@ class FFmpegSubtitleMerger:
             self.logger.info(f"视频信息: {width}x{height} @ {fps}fps, 码率: {bitrate}bps")
             return video_info
 
-        except ffmpeg.Error as e:
-            error_msg = e.stderr.decode() if e.stderr else str(e)
-            raise RuntimeError(f"FFmpeg探测失败: {error_msg}")
         except Exception as e:
             raise RuntimeError(f"获取视频信息失败: {e}")
     
@@ -199,15 +451,22 @@ class FFmpegSubtitleMerger:
     
     def check_nvidia_support(self) -> bool:
         """
-        检查是否支持英伟达硬件编码
+        检查是否支持英伟达硬件编码，结果会被缓存
 
         Returns:
             是否支持NVENC
         """
+        with self._nvenc_lock:
+            if self._nvenc_supported is None:
+                self._nvenc_supported = self._probe_nvidia_support()
+            return self._nvenc_supported
+
+    def _probe_nvidia_support(self) -> bool:
+        """实际执行NVENC支持检测"""
         try:
             # 方法1: 直接查询可用编码器
             result = subprocess.run(
-                ['ffmpeg', '-encoders'],
+                ['ffmpeg', '-hide_banner', '-encoders'],
                 capture_output=True,
                 text=True,
                 timeout=10
@@ -222,20 +481,25 @@ class FFmpegSubtitleMerger:
 
         try:
             # 方法2: 尝试创建简单的NVENC编码任务
-            ffmpeg.run(
-                ffmpeg.input('color=c=black:s=320x240:d=0.1', f='lavfi')
-                .output('pipe:', vcodec='h264_nvenc', f='null')
-                .global_args('-hide_banner', '-loglevel', 'error'),
-                capture_stdout=True,
-                capture_stderr=True,
+            result = subprocess.run(
+                [
+                    'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', 'color=c=black:s=320x240:d=0.1',
+                    '-c:v', 'h264_nvenc', '-f', 'null', '-'
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=5
             )
-            self.logger.info("NVIDIA NVENC编码器测试成功")
-            return True
+            if result.returncode == 0:
+                self.logger.info("NVIDIA NVENC编码器测试成功")
+                return True
+
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            pass
 
-        except (ffmpeg.Error, subprocess.TimeoutExpired):
-            self.logger.info("NVIDIA NVENC编码器不可用，将使用软件编码")
-            return False
+        self.logger.info("NVIDIA NVENC编码器不可用，将使用软件编码")
+        return False
     
     def escape_subtitle_path(self, subtitle_path: str) -> str:
         """
@@ -245,44 +509,21 @@ class FFmpegSubtitleMerger:
             subtitle_path: 原始字幕路径
 
         Returns:
-            转义后的路径
+            转义后的路径，可直接用于滤镜参数
         """
-        # 转换为绝对路径
-        abs_path = os.path.abspath(subtitle_path)
+        return _escape_abs_subtitle_path(os.path.abspath(subtitle_path))
 
-        # Windows路径处理
-        if os.name == 'nt':
-            # 将反斜杠转换为正斜杠
-            abs_path = abs_path.replace('\\', '/')
-            # 转义冒号
-            abs_path = abs_path.replace(':', '\\:')
-
-        # 转义其他特殊字符
-        abs_path = abs_path.replace('[', '\\[').replace(']', '\\]')
-
-        return abs_path
-
-    def merge_video_subtitle(
-        self,
-        video_path: str,
-        subtitle_path: str,
-        output_path: str,
-        force_style: Optional[str] = None,
-        progress_callback: Optional[callable] = None
-    ) -> None:
+    def _select_encoder(self, video_path: str, gpu: Optional[bool] = None) -> Tuple[str, Tuple[str, ...]]:
         """
-        合成视频和字幕
+        根据视频信息和硬件支持选择编码器及参数
 
         Args:
             video_path: 输入视频路径
-            subtitle_path: 输入字幕路径
-            output_path: 输出视频路径
-            force_style: 强制字幕样式
-            progress_callback: 进度回调函数
-        """
-        # 验证输入
-        self.validate_inputs(video_path, subtitle_path)
+            gpu: 是否使用NVIDIA硬件编解码，None表示自动检测
 
+        Returns:
+            (编码器名称, 编码参数)
+        """
         # 获取视频信息
         video_info = self.probe_video_info(video_path)
 
@@ -295,80 +536,259 @@ class FFmpegSubtitleMerger:
         )
 
         # 检查NVIDIA支持
-        use_nvenc = self.check_nvidia_support()
+        use_nvenc = self.check_nvidia_support() if gpu is None else gpu
 
         if use_nvenc:
             self.logger.info("使用NVIDIA硬件编码 (h264_nvenc)")
             video_codec = 'h264_nvenc'
-            # NVENC特定参数
-            codec_params = {
-                'preset': 'medium',
-                'rc': 'vbr',
-                'cq': '23',
-                'b:v': f"{smart_bitrate}",
-                'maxrate': f"{int(smart_bitrate * 1.2)}",
-                'bufsize': f"{int(smart_bitrate * 2)}",
-                'gpu': '0'  # 使用第一个GPU
-            }
         else:
             self.logger.info("使用软件编码 (libx264)")
             video_codec = 'libx264'
-            # x264参数
-            codec_params = {
-                'preset': 'medium',
-                'crf': '23',
-                'b:v': f"{smart_bitrate}",
-                'threads': '0'  # 自动检测线程数
-            }
-        
-        # 构建FFmpeg命令
-        input_video = ffmpeg.input(video_path)
-        
-        # 字幕滤镜参数
-        subtitle_filter_params = {'filename': subtitle_path}
+
+        return video_codec, _build_codec_args(video_codec, smart_bitrate)
+
+    def _build_input_args(self, video_path: str, video_codec: str) -> List[str]:
+        """构建单个视频的FFmpeg输入参数"""
+        if video_codec == 'h264_nvenc':
+            # 使用NVDEC硬件解码；subtitles滤镜只能处理内存中的帧，
+            # 因此不指定hwaccel_output_format，解码后的帧由FFmpeg自动下载
+            return ['-hwaccel', 'cuda', '-i', video_path]
+        return ['-i', video_path]
+
+    def _build_subtitle_filter(self, subtitle_path: str, force_style: Optional[str] = None) -> str:
+        """构建subtitles滤镜字符串"""
+        subtitle_filter = f"subtitles=filename={self.escape_subtitle_path(subtitle_path)}"
+        if self.fonts_dir:
+            subtitle_filter += f":fontsdir={self.escape_subtitle_path(self.fonts_dir)}"
         if force_style:
-            subtitle_filter_params['force_style'] = force_style
-        
-        # 应用字幕滤镜
-        video_with_subtitles = input_video.video.filter('subtitles', **subtitle_filter_params)
-        
-        # 音频流（直接复制）
-        audio = input_video.audio
-        
-        # 输出配置
-        output_params = {
-            'vcodec': video_codec,
-            'acodec': 'copy',  # 音频直接复制
-            'pix_fmt': 'yuv420p',
-            **codec_params
-        }
-        
-        # 构建输出
-        output = ffmpeg.output(
-            video_with_subtitles,
-            audio,
-            output_path,
-            **output_params
+            subtitle_filter += f":force_style={force_style.translate(_FILTER_VALUE_ESCAPES)}"
+        return subtitle_filter
+
+    def warm_up_fonts(self) -> None:
+        """
+        用一次极短的字幕渲染预热libass/fontconfig字体缓存
+
+        首次扫描系统字体可能需要数秒，预热后并行的合成任务不必各自重建缓存
+        """
+        fd, subtitle_path = tempfile.mkstemp(suffix='.ass')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(_WARMUP_SUBTITLE)
+
+            result = subprocess.run(
+                [
+                    'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', 'color=c=black:s=64x64:d=0.1',
+                    '-vf', self._build_subtitle_filter(subtitle_path),
+                    '-f', 'null', '-'
+                ],
+                capture_output=True,
+                timeout=60
+            )
+            if result.returncode == 0:
+                self.logger.debug("字体缓存预热完成")
+            else:
+                self.logger.debug(f"字体缓存预热失败: {result.stderr.decode(errors='replace').strip()}")
+
+        except (subprocess.SubprocessError, OSError) as e:
+            self.logger.debug(f"字体缓存预热失败: {e}")
+        finally:
+            try:
+                os.remove(subtitle_path)
+            except OSError:
+                pass
+
+    def _build_output_args(
+        self,
+        input_index: int,
+        subtitle_path: str,
+        output_path: str,
+        force_style: Optional[str],
+        video_codec: str,
+        codec_args: Tuple[str, ...]
+    ) -> List[str]:
+        """构建单个文件的FFmpeg输出参数"""
+        subtitle_filter = self._build_subtitle_filter(subtitle_path, force_style)
+
+        return [
+            '-map', f'{input_index}:v:0',
+            '-map', f'{input_index}:a?',  # 音频流（直接复制）
+            '-vf', subtitle_filter,
+            '-c:v', video_codec,
+            '-c:a', 'copy',
+            '-pix_fmt', 'yuv420p',
+            *codec_args,
+            output_path
+        ]
+
+    def _run_ffmpeg(self, args: List[str]) -> None:
+        """
+        运行FFmpeg命令，输出直接显示在终端
+
+        Args:
+            args: ffmpeg之后的命令行参数
+        """
+        # 并行运行多个FFmpeg时，不让它们争用终端输入和终端设置
+        cmd = ['ffmpeg', '-y', '-nostdin', *args]
+        self.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(cmd)}")
+
+        try:
+            result = subprocess.run(cmd, stdin=subprocess.DEVNULL)
+        except FileNotFoundError:
+            raise RuntimeError("FFmpeg未安装或不在PATH中")
+
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg处理失败: 退出码 {result.returncode}")
+
+    def _mux_subtitle(self, video_path: str, subtitle_path: str, output_path: str) -> None:
+        """
+        将字幕作为独立字幕流封装，音视频直接复制不重新编码
+
+        Args:
+            video_path: 输入视频路径
+            subtitle_path: 输入字幕路径
+            output_path: 输出视频路径
+        """
+        output_ext = Path(output_path).suffix.lower()
+        if output_ext not in SOFT_SUBTITLE_CODECS:
+            raise ValueError(f"软字幕不支持的输出格式: {output_ext}，支持的格式: {list(SOFT_SUBTITLE_CODECS)}")
+
+        subtitle_codec = SOFT_SUBTITLE_CODECS[output_ext]
+        if subtitle_codec == 'copy' and Path(subtitle_path).suffix.lower() not in ('.ass', '.srt'):
+            # 其他字幕格式转为SRT后再封装进MKV
+            subtitle_codec = 'srt'
+
+        print(f"开始封装软字幕...")
+        print(f"输入视频: {video_path}")
+        print(f"输入字幕: {subtitle_path}")
+        print(f"输出视频: {output_path}")
+
+        # 只保留音视频并替换原有字幕流，使新字幕成为默认显示的第一条字幕；
+        # 数据流（DVD导航包、SCTE-35、tmcd等）会被MKV/MP4封装器拒绝，不复制
+        self._run_ffmpeg([
+            '-i', video_path,
+            '-i', subtitle_path,
+            '-map', '0:v',
+            '-map', '0:a?',
+            '-map', '1',
+            '-c', 'copy',
+            '-c:s', subtitle_codec,
+            '-disposition:s:0', 'default',
+            output_path
+        ])
+
+        print("软字幕封装完成!")
+
+    def should_mux_subtitle(
+        self,
+        subtitle_path: str,
+        output_path: str,
+        force_style: Optional[str] = None
+    ) -> bool:
+        """
+        判断能否以软字幕封装代替烧录
+
+        Args:
+            subtitle_path: 输入字幕路径
+            output_path: 输出视频路径
+            force_style: 强制字幕样式
+
+        Returns:
+            未指定样式且输出和字幕格式都支持封装时返回True
+        """
+        return (
+            not force_style
+            and Path(output_path).suffix.lower() in AUTO_MUX_OUTPUT_FORMATS
+            and Path(subtitle_path).suffix.lower() in AUTO_MUX_SUBTITLE_FORMATS
         )
+
+    def merge_video_subtitle(
+        self,
+        video_path: str,
+        subtitle_path: str,
+        output_path: str,
+        force_style: Optional[str] = None,
+        progress_callback: Optional[callable] = None,
+        soft_sub: Optional[bool] = False,
+        gpu: Optional[bool] = None
+    ) -> None:
+        """
+        合成视频和字幕
+
+        Args:
+            video_path: 输入视频路径
+            subtitle_path: 输入字幕路径
+            output_path: 输出视频路径
+            force_style: 强制字幕样式
+            progress_callback: 进度回调函数
+            soft_sub: 封装软字幕而不重新编码视频，None表示自动判断
+            gpu: 是否使用NVDEC解码+NVENC编码，None表示自动检测；
+                subtitles滤镜始终在CPU上运行，GPU只负责两端的解码和编码
+        """
+        # 验证输入
+        self.validate_inputs(video_path, subtitle_path)
+
+        if soft_sub is None:
+            soft_sub = self.should_mux_subtitle(subtitle_path, output_path, force_style)
+
+        if soft_sub:
+            if force_style:
+                self.logger.warning("软字幕模式下忽略强制字幕样式")
+            self._mux_subtitle(video_path, subtitle_path, output_path)
+            return
+
+        video_codec, codec_args = self._select_encoder(video_path, gpu)
         
-        # 覆盖输出文件
-        output = ffmpeg.overwrite_output(output)
+        print(f"开始合成视频...")
+        print(f"输入视频: {video_path}")
+        print(f"输入字幕: {subtitle_path}")
+        print(f"输出视频: {output_path}")
+        print(f"使用编码器: {video_codec}")
         
-        try:
-            print(f"开始合成视频...")
+        # 运行FFmpeg命令
+        self._run_ffmpeg([
+            *self._build_input_args(video_path, video_codec),
+            *self._build_output_args(0, subtitle_path, output_path, force_style, video_codec, codec_args)
+        ])
+        
+        print("视频合成完成!")
+
+    def merge_video_subtitle_group(
+        self,
+        items: List[Tuple[str, str, str]],
+        force_style: Optional[str] = None
+    ) -> None:
+        """
+        在一次FFmpeg调用中合成多个视频和字幕，共享编码器初始化开销
+
+        Args:
+            items: (输入视频路径, 输入字幕路径, 输出视频路径) 列表
+            force_style: 强制字幕样式
+        """
+        input_args = []
+        output_args = []
+        for index, (video_path, subtitle_path, output_path) in enumerate(items):
+            self.validate_inputs(video_path, subtitle_path)
+            video_codec, codec_args = self._select_encoder(video_path)
+            input_args.extend(self._build_input_args(video_path, video_codec))
+            output_args.extend(self._build_output_args(
+                index,
+                subtitle_path,
+                output_path,
+                force_style,
+                video_codec,
+                codec_args
+            ))
+
+        print(f"开始合成 {len(items)} 个视频...")
+        for video_path, subtitle_path, output_path in items:
             print(f"输入视频: {video_path}")
             print(f"输入字幕: {subtitle_path}")
             print(f"输出视频: {output_path}")
-            print(f"使用编码器: {video_codec}")
-            
-            # 运行FFmpeg命令
-            ffmpeg.run(output, capture_stdout=False, capture_stderr=False)
-            
-            print("视频合成完成!")
-            
-        except ffmpeg.Error as e:
-            error_msg = e.stderr.decode() if e.stderr else str(e)
-            raise RuntimeError(f"FFmpeg处理失败: {error_msg}")
+
+        self._run_ffmpeg([*input_args, *output_args])
+
+        print("视频合成完成!")
 
 
 def main():
@@ -381,6 +801,7 @@ def main():
   python ffmpeg_subtitle_merger.py input.mps subtitle.ass output.mp4
   python ffmpeg_subtitle_merger.py input.mp4 subtitle.ass output.mp4 --force-style "FontSize=24,PrimaryColour=&H00FFFF"
   python ffmpeg_subtitle_merger.py input.mp4 subtitle.ass output.mp4 --log-level DEBUG
+  python ffmpeg_subtitle_merger.py input.mp4 subtitle.srt output.mkv --soft-sub
         """
     )
 
@@ -391,12 +812,26 @@ def main():
         '--force-style',
         help='强制字幕样式 (例如: "FontSize=24,PrimaryColour=&H00FFFF")'
     )
+    parser.add_argument(
+        '--auto-mux',
+        action='store_true',
+        help='输出为MKV/MP4、字幕为SRT/ASS且未指定--force-style时，自动改为封装软字幕'
+    )
+    parser.add_argument(
+        '--fonts-dir',
+        help='字幕渲染额外使用的字体目录'
+    )
     parser.add_argument(
         '--log-level',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
         default='INFO',
         help='日志级别 (默认: INFO)'
     )
+    parser.add_argument(
+        '--soft-sub',
+        action='store_true',
+        help=f'封装软字幕而不重新编码视频，速度快得多 (输出格式: {"/".join(SOFT_SUBTITLE_CODECS)})'
+    )
     parser.add_argument(
         '--check-only',
         action='store_true',
@@ -406,7 +841,8 @@ def main():
     args = parser.parse_args()
 
     try:
-        merger = FFmpegSubtitleMerger(log_level=args.log_level)
+        configure_logging(args.log_level)
+        merger = FFmpegSubtitleMerger(fonts_dir=args.fonts_dir)
 
         if args.check_only:
             # 仅执行检查
@@ -426,7 +862,8 @@ def main():
                 args.video,
                 args.subtitle,
                 args.output,
-                args.force_style
+                args.force_style,
+                soft_sub=True if args.soft_sub else (None if args.auto_mux else False)
             )
 
     except KeyboardInterrupt:
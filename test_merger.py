@@ -6,42 +6,192 @@ FFmpeg字幕合成工具测试脚本
 
 import os
 import sys
+import asyncio
+import shutil
+import hashlib
 import tempfile
+import traceback
 import subprocess
-import glob
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Iterator
 
-def create_test_video(output_path: str, duration: int = 5) -> bool:
+try:
+    from ffmpeg_subtitle_merger import FFmpegSubtitleMerger, default_jobs
+except ImportError as e:
+    print(f"❌ 无法导入ffmpeg_subtitle_merger: {e}")
+    print("请在项目目录中运行，并确认已安装依赖: pip install -r requirements.txt")
+    sys.exit(1)
+
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mkv', '.mov', '.mps', '.ts', '.m2ts'})
+SUBTITLE_EXTS = frozenset({'.ass', '.srt', '.vtt', '.sub'})
+
+# 默认测试目录，setup_test_environment总是在这里生成示例文件
+DEFAULT_TEST_DIR = r"C:\Users\Nickxxx\Desktop\测试视频合成"
+
+# 测试字幕内容
+_ASS_TEMPLATE = """[Script Info]
+Title: Test Subtitle
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,24,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,0,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,测试字幕 1
+Dialogue: 0,0:00:03.50,0:00:05.00,Default,,0,0,0,,测试字幕 2
+"""
+
+def _walk(root: str, exts: frozenset) -> Iterator[str]:
+    """
+    单次遍历目录树，生成扩展名匹配的文件路径
+
+    Args:
+        root: 根目录
+        exts: 小写扩展名集合（含"."）
+
+    Yields:
+        文件路径
+    """
+    try:
+        stack = [os.scandir(root)]
+    except OSError:
+        return
+    try:
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop().close()
+                continue
+            # 与glob一致，跳过隐藏文件和目录
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    stack.append(os.scandir(entry.path))
+                except OSError:
+                    pass
+            elif entry.is_file(follow_symlinks=False) and os.path.splitext(entry.name)[1].lower() in exts:
+                yield entry.path
+    finally:
+        for iterator in stack:
+            iterator.close()
+
+@lru_cache(maxsize=32)
+def _find_files(abs_root: str, mtime_ns: int, exts: frozenset) -> tuple:
+    """
+    缓存的目录遍历结果
+
+    mtime_ns只作为缓存键；子目录变化不会更新根目录的修改时间，
+    因此创建测试文件后需手动调用cache_clear()
+    """
+    return tuple(_walk(abs_root, exts))
+
+def _find_cached(test_dir: str, exts: frozenset) -> list:
+    """查找目录中扩展名匹配的文件，同一次运行内复用遍历结果"""
+    try:
+        mtime_ns = os.stat(test_dir).st_mtime_ns
+    except OSError:
+        return []
+    return list(_find_files(os.path.abspath(test_dir), mtime_ns, exts))
+
+def _verify_output(path: str) -> int:
+    """
+    检查输出文件
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        文件大小，文件不存在时为0
+    """
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+def create_test_video(output_path: str, duration: int = 5, use_nvenc: bool = False) -> bool:
     """
     创建测试视频文件
     
     Args:
         output_path: 输出路径
         duration: 视频时长（秒）
+        use_nvenc: 是否使用NVENC硬件编码
         
     Returns:
         是否创建成功
     """
+    # 测试视频只作占位，用最快的编码参数
+    if use_nvenc:
+        video_args = ['-c:v', 'h264_nvenc', '-preset', 'p1', '-tune', 'll', '-rc', 'constqp', '-qp', '28']
+    else:
+        video_args = [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-tune', 'zerolatency',
+            '-x264-params', 'keyint=25:min-keyint=25',
+        ]
+
     try:
         cmd = [
             'ffmpeg', '-y',
+            '-filter_threads', str(os.cpu_count() or 4),
             '-f', 'lavfi',
             '-i', f'testsrc=duration={duration}:size=1280x720:rate=25',
             '-f', 'lavfi', 
-            '-i', 'sine=frequency=1000:duration=5',
-            '-c:v', 'libx264',
+            '-i', f'sine=frequency=1000:duration={duration}',
+            *video_args,
             '-c:a', 'aac',
             '-shortest',
+            '-threads', '0',
             output_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        # 命令未变且文件非空时直接复用，避免重复编码
+        stamp_path = Path(output_path + '.stamp')
+        stamp = hashlib.blake2b(str(cmd).encode()).hexdigest()[:16]
+        try:
+            if stamp_path.read_text() == stamp and _verify_output(output_path):
+                return True
+        except OSError:
+            pass
+
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            # 只在失败时解码FFmpeg的错误输出
+            print(result.stderr[-2000:].decode('utf-8', errors='replace'))
+            return False
+        stamp_path.write_text(stamp)
+        _find_files.cache_clear()
+        return True
         
     except Exception as e:
         print(f"创建测试视频失败: {e}")
         return False
 
+def _copy_fixture(source_path: str, output_path: str) -> bool:
+    """
+    复制已有的测试文件，Linux上shutil.copyfile使用内核内复制
+
+    Args:
+        source_path: 源文件路径
+        output_path: 输出路径
+
+    Returns:
+        是否复制成功
+    """
+    try:
+        shutil.copyfile(source_path, output_path)
+    except OSError as e:
+        print(f"复制测试文件失败: {e}")
+        return False
+    _find_files.cache_clear()
+    return True
+
 def create_test_subtitle(output_path: str) -> bool:
     """
     创建测试字幕文件
@@ -53,22 +203,8 @@ def create_test_subtitle(output_path: str) -> bool:
         是否创建成功
     """
     try:
-        subtitle_content = """[Script Info]
-Title: Test Subtitle
-ScriptType: v4.00+
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,24,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,0,2,10,10,10,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,测试字幕 1
-Dialogue: 0,0:00:03.50,0:00:05.00,Default,,0,0,0,,测试字幕 2
-"""
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(subtitle_content)
+        Path(output_path).write_text(_ASS_TEMPLATE, encoding='utf-8')
+        _find_files.cache_clear()
         return True
         
     except Exception as e:
@@ -85,18 +221,7 @@ def find_test_videos(test_dir: str) -> list:
     Returns:
         视频文件路径列表
     """
-    video_extensions = ['*.mp4', '*.avi', '*.mkv', '*.mov', '*.mps', '*.ts', '*.m2ts']
-    video_files = []
-
-    if os.path.exists(test_dir):
-        for ext in video_extensions:
-            pattern = os.path.join(test_dir, ext)
-            video_files.extend(glob.glob(pattern))
-            # 也搜索子目录
-            pattern = os.path.join(test_dir, '**', ext)
-            video_files.extend(glob.glob(pattern, recursive=True))
-
-    return video_files
+    return _find_cached(test_dir, VIDEO_EXTS)
 
 def find_test_subtitles(test_dir: str) -> list:
     """
@@ -108,33 +233,114 @@ def find_test_subtitles(test_dir: str) -> list:
     Returns:
         字幕文件路径列表
     """
-    subtitle_extensions = ['*.ass', '*.srt', '*.vtt', '*.sub']
-    subtitle_files = []
+    return _find_cached(test_dir, SUBTITLE_EXTS)
+
+async def _merge_real_file(
+    merger,
+    semaphore: asyncio.Semaphore,
+    test_video: str,
+    test_subtitle: str,
+    output_video: str,
+    gpu: bool = False,
+    debug: bool = False
+) -> bool:
+    """
+    验证并合成单个真实视频文件
 
-    if os.path.exists(test_dir):
-        for ext in subtitle_extensions:
-            pattern = os.path.join(test_dir, ext)
-            subtitle_files.extend(glob.glob(pattern))
-            # 也搜索子目录
-            pattern = os.path.join(test_dir, '**', ext)
-            subtitle_files.extend(glob.glob(pattern, recursive=True))
+    输入验证和视频信息获取同时进行，合成步骤受信号量限制并发数
 
-    return subtitle_files
+    Args:
+        semaphore: 限制同时合成数量的信号量
+        gpu: 是否使用NVIDIA硬件编解码
+        debug: 失败时是否输出完整调用栈
 
-def test_with_real_files(test_dir: str) -> bool:
+    Returns:
+        是否合成成功
     """
-    使用真实文件进行测试
+    loop = asyncio.get_running_loop()
+    name = os.path.basename(test_video)
+
+    try:
+        _, video_info = await asyncio.gather(
+            loop.run_in_executor(None, merger.validate_inputs, test_video, test_subtitle),
+            loop.run_in_executor(None, merger.probe_video_info, test_video)
+        )
+        print(f"[{name}] 测试字幕: {os.path.basename(test_subtitle)}")
+        print(f"[{name}] ✅ 输入文件验证通过")
+        print(f"[{name}] ✅ 视频信息: {video_info['width']}x{video_info['height']} @ {video_info['fps']:.2f}fps")
+        print(f"[{name}]    编码器: {video_info['codec']}, 码率: {video_info['bitrate']} bps")
+
+        # 执行合成
+        async with semaphore:
+            await loop.run_in_executor(None, partial(
+                merger.merge_video_subtitle,
+                test_video,
+                test_subtitle,
+                output_video,
+                gpu=gpu
+            ))
+
+        # 验证输出
+        output_size = _verify_output(output_video)
+        if not output_size:
+            raise RuntimeError("输出文件创建失败")
+    except Exception as e:
+        print(f"❌ 测试失败: {name} - {e}")
+        if debug:
+            traceback.print_exc()
+        return False
+
+    print(f"✅ 字幕合成成功: {name}")
+    print(f"   输出文件: {output_video}")
+    print(f"   文件大小: {output_size:,} bytes")
+    return True
+
+async def _run_real_file_jobs(merger, jobs: list, debug: bool = False) -> int:
+    """
+    并发执行真实文件合成任务
+
+    Args:
+        merger: 合成器实例
+        jobs: (视频路径, 字幕路径, 输出路径) 列表
+        debug: 失败时是否输出完整调用栈
+
+    Returns:
+        失败的任务数
+    """
+    # 检查NVIDIA支持
+    print("检查NVIDIA支持...")
+    nvenc_support = await asyncio.get_running_loop().run_in_executor(None, merger.check_nvidia_support)
+    print(f"✅ NVIDIA编码支持: {'是' if nvenc_support else '否'}")
+
+    max_workers = min(default_jobs(nvenc_support), len(jobs))
+
+    print(f"执行字幕合成 ({len(jobs)} 个视频，并行数: {max_workers})...")
+    semaphore = asyncio.Semaphore(max_workers)
+    results = await asyncio.gather(*(
+        _merge_real_file(merger, semaphore, *job, gpu=nvenc_support, debug=debug)
+        for job in jobs
+    ))
+    return results.count(False)
+
+def test_with_real_files(test_dir: str, merger=None, debug: bool = False) -> bool:
+    """
+    使用真实文件进行测试，目录中的多个视频并行合成
 
     Args:
         test_dir: 测试目录路径
+        merger: 复用的合成器实例，可沿用已缓存的NVENC检测结果
+        debug: 失败时是否输出完整调用栈
 
     Returns:
         测试是否成功
     """
     print(f"\n=== 使用真实文件测试 (目录: {test_dir}) ===")
 
-    # 查找视频和字幕文件
-    video_files = find_test_videos(test_dir)
+    # 查找视频和字幕文件，跳过之前测试生成的输出
+    video_files = [
+        video for video in find_test_videos(test_dir)
+        if not Path(video).stem.endswith('_with_subtitles')
+    ]
     subtitle_files = find_test_subtitles(test_dir)
 
     print(f"找到 {len(video_files)} 个视频文件")
@@ -153,84 +359,69 @@ def test_with_real_files(test_dir: str) -> bool:
             return False
         subtitle_files = [test_subtitle]
 
-    # 选择第一个视频和字幕文件进行测试
-    test_video = video_files[0]
-    test_subtitle = subtitle_files[0]
-
-    print(f"测试视频: {os.path.basename(test_video)}")
-    print(f"测试字幕: {os.path.basename(test_subtitle)}")
-
-    # 生成输出文件名
-    video_name = Path(test_video).stem
-    output_video = os.path.join(test_dir, f"{video_name}_with_subtitles.mp4")
+    # 优先使用同名字幕，否则使用第一个字幕文件
+    subtitles_by_stem = {}
+    for subtitle in subtitle_files:
+        subtitles_by_stem.setdefault(Path(subtitle).stem, subtitle)
+
+    # 输出统一为MP4并放在输入旁边；非MP4输入把原扩展名并入文件名，
+    # 避免同目录的 a.mp4 和 a.mkv 并行写入同一个输出文件
+    jobs = []
+    for test_video in video_files:
+        video_path = Path(test_video)
+        test_subtitle = subtitles_by_stem.get(video_path.stem, subtitle_files[0])
+        source_ext = video_path.suffix
+        output_stem = video_path.stem if source_ext == '.mp4' else f"{video_path.stem}_{source_ext[1:]}"
+        output_video = str(video_path.with_name(f"{output_stem}_with_subtitles.mp4"))
+        jobs.append((test_video, test_subtitle, output_video))
 
     try:
-        from ffmpeg_subtitle_merger import FFmpegSubtitleMerger
-
-        merger = FFmpegSubtitleMerger(log_level='INFO')
-
-        # 验证输入文件
-        print("验证输入文件...")
-        merger.validate_inputs(test_video, test_subtitle)
-        print("✅ 输入文件验证通过")
-
-        # 获取视频信息
-        print("获取视频信息...")
-        video_info = merger.probe_video_info(test_video)
-        print(f"✅ 视频信息: {video_info['width']}x{video_info['height']} @ {video_info['fps']:.2f}fps")
-        print(f"   编码器: {video_info['codec']}, 码率: {video_info['bitrate']} bps")
-
-        # 检查NVIDIA支持
-        print("检查NVIDIA支持...")
-        nvenc_support = merger.check_nvidia_support()
-        print(f"✅ NVIDIA编码支持: {'是' if nvenc_support else '否'}")
+        if merger is None:
+            merger = FFmpegSubtitleMerger(log_level='INFO')
 
-        # 执行合成
-        print("执行字幕合成...")
-        merger.merge_video_subtitle(
-            test_video,
-            test_subtitle,
-            output_video
-        )
+        failed = asyncio.run(_run_real_file_jobs(merger, jobs, debug))
 
-        # 验证输出
-        if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
-            output_size = os.path.getsize(output_video)
-            print(f"✅ 字幕合成成功!")
-            print(f"   输出文件: {output_video}")
-            print(f"   文件大小: {output_size:,} bytes")
-            return True
-        else:
-            print("❌ 输出文件创建失败")
+        if failed:
+            print(f"❌ {failed}/{len(jobs)} 个视频测试失败")
             return False
+        return True
 
     except Exception as e:
         print(f"❌ 测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        if debug:
+            traceback.print_exc()
         return False
 
-def test_merger(test_dir: str = None):
-    """测试字幕合成工具"""
+def test_merger(test_dir: str = None, verbose: bool = False, debug: bool = False):
+    """
+    测试字幕合成工具
+
+    Args:
+        test_dir: 测试目录路径
+        verbose: 是否输出FFmpeg版本信息
+        debug: 失败时是否输出完整调用栈
+    """
     print("=== FFmpeg字幕合成工具测试 ===")
 
-    # 检查FFmpeg是否可用
-    try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True)
-        if result.returncode != 0:
-            print("❌ FFmpeg不可用")
-            return False
-        print("✅ FFmpeg可用")
-    except FileNotFoundError:
+    # 检查FFmpeg是否可用，只在PATH中查找，无需启动FFmpeg
+    if shutil.which('ffmpeg') is None:
         print("❌ FFmpeg未安装或不在PATH中")
         return False
+    print("✅ FFmpeg可用")
+    if verbose:
+        subprocess.run(['ffmpeg', '-hide_banner', '-version'])
+
+    merger = FFmpegSubtitleMerger(log_level='INFO')
+
+    nvenc_support = merger.check_nvidia_support()
+    print(f"✅ NVIDIA编码支持: {'是' if nvenc_support else '否'}")
 
     # 用户指定的测试目录
-    user_test_dir = test_dir or r"C:\Users\Nickxxx\Desktop\测试视频合成"
+    user_test_dir = test_dir or DEFAULT_TEST_DIR
 
     # 首先尝试使用真实文件测试
     if os.path.exists(user_test_dir):
-        success = test_with_real_files(user_test_dir)
+        success = test_with_real_files(user_test_dir, merger, debug=debug)
         if success:
             return True
         print("真实文件测试失败，继续使用生成的测试文件...")
@@ -249,58 +440,74 @@ def test_merger(test_dir: str = None):
 
     # 使用生成的测试文件
     print(f"\n=== 使用生成的测试文件 ===")
-    test_video = os.path.join(user_test_dir, "test_video.mp4")
-    test_subtitle = os.path.join(user_test_dir, "test_subtitle.ass")
+    # 优先复用setup_test_environment生成的示例视频和字幕
+    sample_video = os.path.join(user_test_dir, "sample_video.mp4")
+    reuse_sample = _verify_output(sample_video) > 0
+    test_video = sample_video if reuse_sample else os.path.join(user_test_dir, "test_video.mp4")
+    # 只复用本脚本生成的字幕；用户字幕可能正是真实文件测试失败的原因
+    existing_subtitle = next((
+        path for path in (
+            os.path.join(user_test_dir, "sample_subtitle.ass"),
+            os.path.join(user_test_dir, "test_subtitle.ass")
+        )
+        if _verify_output(path)
+    ), None)
+    test_subtitle = existing_subtitle or os.path.join(user_test_dir, "test_subtitle.ass")
     output_video = os.path.join(user_test_dir, "output_video.mp4")
 
     print(f"测试目录: {user_test_dir}")
 
     # 创建测试文件
-    print("创建测试视频...")
-    if not create_test_video(test_video):
-        print("❌ 创建测试视频失败")
-        return False
-    print("✅ 测试视频创建成功")
+    setup_sample = os.path.join(DEFAULT_TEST_DIR, "sample_video.mp4")
+    if reuse_sample:
+        print(f"✅ 复用示例视频: {os.path.basename(test_video)}")
+    elif _verify_output(setup_sample) and _copy_fixture(setup_sample, test_video):
+        # 测试目录与setup目录不同时，复制示例视频而不是重新编码
+        print(f"✅ 复制示例视频: {os.path.basename(test_video)}")
+    else:
+        print("准备测试视频...")
+        if not create_test_video(test_video, use_nvenc=nvenc_support):
+            print("❌ 创建测试视频失败")
+            return False
+        print(f"✅ 测试视频就绪: {os.path.basename(test_video)}")
 
-    print("创建测试字幕...")
-    if not create_test_subtitle(test_subtitle):
-        print("❌ 创建测试字幕失败")
-        return False
-    print("✅ 测试字幕创建成功")
+    if existing_subtitle:
+        print(f"✅ 复用已有字幕: {os.path.basename(test_subtitle)}")
+    else:
+        print("创建测试字幕...")
+        if not create_test_subtitle(test_subtitle):
+            print("❌ 创建测试字幕失败")
+            return False
+        print("✅ 测试字幕创建成功")
 
     # 测试工具
     print("测试字幕合成工具...")
     try:
-        from ffmpeg_subtitle_merger import FFmpegSubtitleMerger
+        # 输入验证和视频信息获取同时进行
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            validate_future = executor.submit(merger.validate_inputs, test_video, test_subtitle)
+            probe_future = executor.submit(merger.probe_video_info, test_video)
 
-        merger = FFmpegSubtitleMerger(log_level='INFO')
+            print("验证输入文件...")
+            validate_future.result()
+            print("✅ 输入文件验证通过")
 
-        # 首先进行检查
-        print("验证输入文件...")
-        merger.validate_inputs(test_video, test_subtitle)
-        print("✅ 输入文件验证通过")
-
-        # 获取视频信息
-        print("获取视频信息...")
-        video_info = merger.probe_video_info(test_video)
-        print(f"✅ 视频信息: {video_info['width']}x{video_info['height']} @ {video_info['fps']:.2f}fps")
-
-        # 检查NVIDIA支持
-        print("检查NVIDIA支持...")
-        nvenc_support = merger.check_nvidia_support()
-        print(f"✅ NVIDIA编码支持: {'是' if nvenc_support else '否'}")
+            print("获取视频信息...")
+            video_info = probe_future.result()
+            print(f"✅ 视频信息: {video_info['width']}x{video_info['height']} @ {video_info['fps']:.2f}fps")
 
         # 执行合成
         print("执行字幕合成...")
         merger.merge_video_subtitle(
             test_video,
             test_subtitle,
-            output_video
+            output_video,
+            gpu=nvenc_support
         )
 
         # 验证输出
-        if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
-            output_size = os.path.getsize(output_video)
+        output_size = _verify_output(output_video)
+        if output_size:
             print(f"✅ 字幕合成成功!")
             print(f"   输出文件: {output_video}")
             print(f"   文件大小: {output_size:,} bytes")
@@ -311,13 +518,13 @@ def test_merger(test_dir: str = None):
 
     except Exception as e:
         print(f"❌ 测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        if debug:
+            traceback.print_exc()
         return False
 
 def setup_test_environment():
     """设置测试环境"""
-    test_dir = r"C:\Users\Nickxxx\Desktop\测试视频合成"
+    test_dir = DEFAULT_TEST_DIR
 
     print(f"=== 设置测试环境 ===")
     print(f"测试目录: {test_dir}")
@@ -348,22 +555,22 @@ def setup_test_environment():
         if len(subtitle_files) > 3:
             print(f"   ... 还有 {len(subtitle_files) - 3} 个文件")
 
-    # 如果没有测试文件，创建一些
+    # 如果没有测试文件，创建一些；各示例文件互不依赖，同时创建
+    fixtures = []
     if not video_files:
-        print("创建示例视频文件...")
-        test_video = os.path.join(test_dir, "sample_video.mp4")
-        if create_test_video(test_video, duration=10):
-            print(f"✅ 创建示例视频: {os.path.basename(test_video)}")
-        else:
-            print("❌ 创建示例视频失败")
-
+        fixtures.append(("示例视频", os.path.join(test_dir, "sample_video.mp4"), partial(create_test_video, duration=10)))
     if not subtitle_files:
-        print("创建示例字幕文件...")
-        test_subtitle = os.path.join(test_dir, "sample_subtitle.ass")
-        if create_test_subtitle(test_subtitle):
-            print(f"✅ 创建示例字幕: {os.path.basename(test_subtitle)}")
-        else:
-            print("❌ 创建示例字幕失败")
+        fixtures.append(("示例字幕", os.path.join(test_dir, "sample_subtitle.ass"), create_test_subtitle))
+
+    if fixtures:
+        print(f"创建{'、'.join(label for label, _, _ in fixtures)}文件...")
+        with ThreadPoolExecutor(max_workers=len(fixtures)) as executor:
+            futures = [executor.submit(create, path) for _, path, create in fixtures]
+        for (label, path, _), future in zip(fixtures, futures):
+            if future.result():
+                print(f"✅ 创建{label}: {os.path.basename(path)}")
+            else:
+                print(f"❌ 创建{label}失败")
 
     return True
 
@@ -379,6 +586,8 @@ def main():
   python test_merger.py                    # 运行完整测试
   python test_merger.py --setup-only      # 仅设置测试环境
   python test_merger.py --test-dir "路径"  # 指定测试目录
+  python test_merger.py --verbose          # 输出FFmpeg版本信息
+  python test_merger.py --debug            # 失败时输出完整调用栈
         """
     )
 
@@ -390,10 +599,22 @@ def main():
 
     parser.add_argument(
         '--test-dir',
-        default=r"C:\Users\Nickxxx\Desktop\测试视频合成",
+        default=DEFAULT_TEST_DIR,
         help='指定测试目录路径'
     )
 
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='输出FFmpeg版本信息'
+    )
+
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='失败时输出完整调用栈'
+    )
+
     args = parser.parse_args()
 
     if args.setup_only:
@@ -415,7 +636,7 @@ def main():
         sys.exit(1)
 
     print("\n正在运行测试...")
-    success = test_merger(args.test_dir)
+    success = test_merger(args.test_dir, verbose=args.verbose, debug=args.debug)
 
     if success:
         print("\n🎉 所有测试通过!")